@@ -10,21 +10,35 @@ This demo simulates a complete voice banking conversation using:
 - Local NeuTTS TTS (neural voice synthesis)
 """
 
+import argparse
 import asyncio
+import hashlib
 import os
-import io
-import time
 import sys
 import traceback
+import uuid
 import json
+import orjson
+import re
 import websockets
 import audioop
 import wave
+import numpy as np
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, AsyncIterator
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 import aiohttp
-from pydub import AudioSegment
-from pydub.playback import play
+import sounddevice as sd
+from scipy.signal import firwin, resample_poly, upfirdn
+
+# Numba comes with librosa (NeuTTS); without it the table encoder is used
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
 
 # Rich UI Imports
 from rich.console import Console, Group
@@ -43,7 +57,13 @@ console = Console()
 RASA_URL = "http://localhost:5005/webhooks/rest/webhook"
 LOCAL_ASR_URL = "ws://localhost:9001"
 OLLAMA_URL = "http://localhost:11434"
+OLLAMA_MANIFESTS_DIR = Path(
+    os.environ.get("OLLAMA_MODELS", Path.home() / ".ollama" / "models")
+) / "manifests"
+OLLAMA_MODELS_CACHE = Path.home() / ".cache" / "sovereign-demo" / "ollama_models.json"
 AUDIO_DIR = Path("tests/audio")
+RASA_SENDER = "demo-user"   # Cache key namespace; live runs use a fresh "demo-user-<id>"
+RESPONSE_CACHE_PATH = Path(".rasa_cache.json")
 
 # Import local TTS service
 sys.path.insert(0, str(Path(__file__).parent))
@@ -62,6 +82,38 @@ CONVERSATION_STEPS = [
     {"file": "user_input_5.wav", "label": "Confirmation"},
 ]
 
+# Preloaded user clips, keyed by step filename
+ASR_PAYLOAD_CACHE: dict[str, bytes] = {}   # 8kHz mulaw, sent to the ASR server
+USER_AUDIO_PCM: dict[str, bytes] = {}      # 8kHz 16-bit PCM, played to the speaker
+
+# Appended to the audio frame to ask the ASR server to transcribe it, so audio
+# and trigger go out as one message (see services/local_asr_server.py)
+AUDIO_END_MARKER = b"\x00ENDAUDIO"
+
+# Memoized Rasa replies for the scripted conversation (see nlu_worker)
+RESPONSE_CACHE: dict[str, list] = {}
+
+# Pipeline / UI tuning
+QUEUE_DEPTH = 2            # How many turns each stage may run ahead
+MAX_VISIBLE_BUBBLES = 6    # How many chat bubbles to show at once
+RENDER_INTERVAL = 0.1      # Seconds between UI frames
+
+# Sentence boundaries used to split agent replies into TTS chunks
+SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+@dataclass
+class Turn:
+    """One scripted exchange travelling through the pipeline."""
+    step: dict
+    payload: bytes
+    # Filled in by the ASR / Rasa stages; shown by the player as each part plays
+    transcript: str = ""
+    replies: list[str] = field(default_factory=list)
+    transcribed: asyncio.Event = field(default_factory=asyncio.Event)
+    # Agent speech for the player: an int marks the start of replies[i], bytes
+    # are PCM chunks, and None marks the end of the turn
+    audio: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=QUEUE_DEPTH))
+
 def make_layout():
     """Define the 3-section layout: Header, Chat History, Status Footer."""
     layout = Layout()
@@ -72,186 +124,532 @@ def make_layout():
     )
     return layout
 
-async def check_ollama_connection() -> bool:
-    """Verify Ollama is running and ministral model is available."""
+def status_panel(message: str, color: str, style: str | None = None) -> Panel:
+    """Build the footer status panel."""
+    return Panel(
+        Text(message, style=style or f"bold {color}"), 
+        title="Status", border_style=color
+    )
+
+def chat_bubble(text: str, title: str, color: str, align) -> Align:
+    """Build a chat bubble for the conversation log."""
+    return align(
+        Panel(
+            Text(text, style="bright_white"),
+            title=title,
+            style=color,
+            box=box.ROUNDED,
+            padding=(1, 2),
+            width=60
+        )
+    )
+
+async def tcp_alive(url: str, timeout: float = 1.0) -> bool:
+    """Liveness probe: can we open a TCP connection to the URL's host/port?"""
+    address = urlsplit(url)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{OLLAMA_URL}/api/tags", timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    models = [m['name'] for m in data.get('models', [])]
-                    # Check for ministral variants
-                    has_ministral = any('ministral' in m.lower() for m in models)
-                    return has_ministral
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(address.hostname, address.port), timeout
+        )
+        writer.close()
+        await writer.wait_closed()
+        return True
     except Exception:
         return False
-    return False
 
-async def check_asr_connection() -> bool:
-    """Verify Local ASR server is running."""
+def ollama_manifest_mtime() -> float | None:
+    """Last change to Ollama's local model manifests, or None if not visible here."""
     try:
-        async with websockets.connect(LOCAL_ASR_URL, open_timeout=2) as ws:
-            await ws.close()
-            return True
+        return max(os.stat(root).st_mtime for root, _, _ in os.walk(OLLAMA_MANIFESTS_DIR))
+    except (OSError, ValueError):
+        return None
+
+async def list_ollama_models(session: aiohttp.ClientSession) -> list[str]:
+    """
+    List Ollama models, reusing the cached list while the local manifests are
+    unchanged. Falls back to /api/tags on a cache miss.
+    """
+    mtime = ollama_manifest_mtime()
+    try:
+        cached = json.loads(OLLAMA_MODELS_CACHE.read_text())
+        if mtime is not None and cached.get("mtime") == mtime:
+            cached_models: list[str] = cached["models"]
+            return cached_models
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    async with session.get(f"{OLLAMA_URL}/api/tags", timeout=aiohttp.ClientTimeout(total=5)) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+    models = [m['name'] for m in data.get('models', [])]
+    
+    # Best effort: an unwritable cache dir must not fail the Ollama check
+    try:
+        OLLAMA_MODELS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        OLLAMA_MODELS_CACHE.write_text(json.dumps({"mtime": mtime, "models": models}))
+    except OSError:
+        pass
+    return models
+
+async def check_ollama_connection(session: aiohttp.ClientSession) -> bool:
+    """Verify Ollama is running and ministral model is available."""
+    if not await tcp_alive(OLLAMA_URL):
+        return False
+    try:
+        models = await list_ollama_models(session)
     except Exception:
         return False
+    # Check for ministral variants
+    return any('ministral' in m.lower() for m in models)
+
+async def check_asr_connection() -> bool:
+    """Verify Local ASR server is running."""
+    return await tcp_alive(LOCAL_ASR_URL)
 
 async def check_rasa_connection() -> bool:
     """Verify Rasa server is running."""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{RASA_URL.replace('/webhooks/rest/webhook', '')}/", 
-                                   timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                return resp.status == 200
-    except Exception:
-        return False
+    return await tcp_alive(RASA_URL)
 
-async def play_audio_data(audio_bytes: bytes):
-    """Play raw audio bytes."""
-    try:
-        audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="wav")
-        play(audio)
-    except Exception as e:
-        console.print(f"[red]Audio Error: {e}[/red]")
+# ==============================================================================
+# Audio Conversion (vectorized with NumPy lookup tables)
+# ==============================================================================
+# mulaw code (0-255) -> 16-bit linear sample
+ULAW2LIN16 = np.frombuffer(audioop.ulaw2lin(bytes(range(256)), 2), dtype=np.int16).copy()
+
+# G.711 encodes from the top 14 bits of a 16-bit sample, so one table entry
+# per 14-bit value covers every int16 input exactly.
+LIN2ULAW = np.frombuffer(
+    audioop.lin2ulaw(np.arange(-32768, 32768, 4, dtype=np.int16).tobytes(), 2),
+    dtype=np.uint8,
+).copy()
+
+def ulaw_to_pcm16(ulaw_data: bytes) -> bytes:
+    """Decode mulaw bytes to 16-bit PCM."""
+    pcm: np.ndarray = ULAW2LIN16[np.frombuffer(ulaw_data, dtype=np.uint8)]
+    return pcm.tobytes()
 
-async def local_asr_transcribe(audio_path: Path) -> str:
+# Long buffers (e.g. 10-60s VAD-gated streams) go through a compiled,
+# multi-threaded encoder; for short clips NumPy indexing is just as fast.
+NUMBA_MIN_SAMPLES = 80000   # ~10s at 8kHz
+ULAW_BLOCK = 4096           # Samples per parallel work item
+
+if HAVE_NUMBA:
+    @njit(cache=True, parallel=True)
+    def lin16_to_ulaw(samples: np.ndarray) -> np.ndarray:
+        """
+        Mulaw encode via LIN2ULAW in one fused pass. Looking up the 16K-entry
+        table beats computing G.711 segments per sample, and unlike NumPy
+        indexing it needs no int32 temporary.
+        """
+        n = samples.shape[0]
+        out = np.empty(n, dtype=np.uint8)
+        for block in prange((n + ULAW_BLOCK - 1) // ULAW_BLOCK):
+            for i in range(block * ULAW_BLOCK, min(n, (block + 1) * ULAW_BLOCK)):
+                out[i] = LIN2ULAW[(np.int32(samples[i]) + 32768) >> 2]
+        return out
+
+def pcm16_to_ulaw(samples: np.ndarray) -> bytes:
+    """Encode 16-bit PCM samples to mulaw bytes."""
+    ulaw: np.ndarray
+    if HAVE_NUMBA and len(samples) >= NUMBA_MIN_SAMPLES:
+        ulaw = lin16_to_ulaw(samples)
+    else:
+        ulaw = LIN2ULAW[(samples.astype(np.int32) + 32768) >> 2]
+    return ulaw.tobytes()
+
+# Anti-aliasing low-pass for the fixed 16kHz -> 8kHz case, designed once.
+# An odd tap count keeps the group delay a whole number of output samples.
+DECIMATE_2X_TAPS = firwin(numtaps=65, cutoff=0.45, window='hamming').astype(np.float32)
+DECIMATE_2X_DELAY = (len(DECIMATE_2X_TAPS) - 1) // 4
+
+def downsample_16k_to_8k(samples: np.ndarray) -> np.ndarray:
+    """2:1 polyphase FIR decimation using the precomputed taps."""
+    filtered = upfirdn(DECIMATE_2X_TAPS, samples.astype(np.float32), up=1, down=2)
+    filtered = filtered[DECIMATE_2X_DELAY:DECIMATE_2X_DELAY + (len(samples) + 1) // 2]
+    decimated: np.ndarray = np.clip(np.rint(filtered), -32768, 32767).astype(np.int16)
+    return decimated
+
+def resample_pcm16(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """Resample 16-bit PCM samples to target_rate."""
+    if rate == 16000 and target_rate == 8000:
+        return downsample_16k_to_8k(samples)
+    
+    # Generic polyphase path for unusual rates
+    resampled = resample_poly(samples.astype(np.float32), target_rate, rate)
+    pcm: np.ndarray = np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)
+    return pcm
+
+def read_pcm16_8k(audio_path: Path) -> np.ndarray:
+    """Read a WAV file as 8kHz mono 16-bit PCM samples."""
+    with wave.open(str(audio_path), 'rb') as w:
+        frames = w.readframes(w.getnframes())
+        width = w.getsampwidth()
+        rate = w.getframerate()
+        n_channels = w.getnchannels()
+
+    if width != 2:
+        frames = audioop.lin2lin(frames, width, 2)
+    samples = np.frombuffer(frames, dtype=np.int16)
+
+    # Convert to mono
+    if n_channels == 2:
+        left, right = samples[0::2], samples[1::2]
+        samples = ((left.astype(np.int32) + right) // 2).astype(np.int16)
+
+    # Resample to 8kHz
+    if rate != 8000:
+        samples = resample_pcm16(samples, rate, 8000)
+
+    return samples
+
+def load_user_audio(audio_path: Path) -> tuple[bytes, bytes]:
     """
-    Send audio to Local ASR server (Faster-Whisper).
-    Converts to 8kHz mulaw format that server expects.
+    Load a user clip as (8kHz PCM for playback, 8kHz mulaw ASR payload).
+    generate_user_audio.py writes the payload next to the WAV; encode only if it's missing.
     """
-    try:
-        async with websockets.connect(LOCAL_ASR_URL, open_timeout=5) as ws:
-            # Read WAV file
-            with wave.open(str(audio_path), 'rb') as w:
-                frames = w.readframes(w.getnframes())
-                width = w.getsampwidth()
-                rate = w.getframerate()
-                n_channels = w.getnchannels()
-                
-                # Convert to mono
-                if n_channels == 2:
-                    frames = audioop.tomono(frames, width, 0.5, 0.5)
-                
-                # Resample to 8kHz
-                if rate != 8000:
-                    frames, _ = audioop.ratecv(frames, width, 1, rate, 8000, None)
-                
-                # Encode to u-law
-                mulaw_bytes = audioop.lin2ulaw(frames, width)
-            
-            # Send audio bytes
-            await ws.send(mulaw_bytes)
-            
-            # Trigger transcription
-            await ws.send(json.dumps({"action": "transcribe"}))
-            
-            # Wait for response
-            response = await ws.recv()
-            data = json.loads(response)
-            return data.get("text", "").strip()
-            
-    except Exception as e:
-        console.print(f"[red]ASR Error: {e}[/red]")
-        return ""
+    samples = read_pcm16_8k(audio_path)
+    ulaw_path = audio_path.with_suffix(".ulaw")
+    payload = ulaw_path.read_bytes() if ulaw_path.exists() else pcm16_to_ulaw(samples)
+    return samples.tobytes(), payload
 
-async def neutts_synthesize(text: str, tts_service: NeuTTSService) -> bytes:
+async def preload_user_audio():
+    """
+    Decode every conversation step's audio once at startup.
+    The script is static, so file I/O and conversion stay off the per-turn path.
+    """
+    steps = [step for step in CONVERSATION_STEPS if (AUDIO_DIR / step['file']).exists()]
+    loaded = await asyncio.gather(
+        *(asyncio.to_thread(load_user_audio, AUDIO_DIR / step['file']) for step in steps)
+    )
+    for step, (pcm, payload) in zip(steps, loaded):
+        USER_AUDIO_PCM[step['file']] = pcm
+        ASR_PAYLOAD_CACHE[step['file']] = payload
+
+async def local_asr_transcribe(ws, payload: bytes) -> str:
+    """
+    Send pre-encoded 8kHz mulaw audio over an open Local ASR WebSocket.
+    """
+    await ws.send(payload + AUDIO_END_MARKER)
+    data = orjson.loads(await ws.recv())
+    return data.get("text", "").strip()
+
+class ASRConnection:
+    """Persistent WebSocket to the Local ASR server, reused across turns."""
+
+    def __init__(self, url: str = LOCAL_ASR_URL):
+        self.url = url
+        self.ws = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, open_timeout=5, ping_interval=20)
+
+    async def transcribe(self, payload: bytes) -> str:
+        """Transcribe a payload, reconnecting once if the server dropped us."""
+        try:
+            try:
+                return await local_asr_transcribe(self.ws, payload)
+            except websockets.exceptions.ConnectionClosed:
+                await self.connect()
+                return await local_asr_transcribe(self.ws, payload)
+        except Exception as e:
+            console.print(f"[red]ASR Error: {e}[/red]")
+            return ""
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+async def stream_tts_pcm(text: str, tts_service: NeuTTSService) -> AsyncIterator[bytes]:
     """
     Generate speech using NeuTTS.
-    Returns PCM audio data (8kHz, 16-bit).
+    Yields PCM audio data (8kHz, 16-bit) chunk by chunk as it is synthesized.
     """
     try:
-        ulaw_data = bytearray()
         async for chunk in tts_service.synthesize(text):
-            ulaw_data.extend(chunk)
-        
-        if not ulaw_data:
-            return b""
-        
-        # Convert mulaw back to PCM for playback
-        pcm_data = audioop.ulaw2lin(bytes(ulaw_data), 2)
-        return pcm_data
-        
+            # Convert mulaw back to PCM for playback
+            yield ulaw_to_pcm16(chunk)
     except Exception as e:
         console.print(f"[red]TTS Error: {e}[/red]")
         traceback.print_exc()
-        return b""
 
-async def run_demo():
-    layout = make_layout()
-    
-    # Header Styling
-    header_text = Text("🎁 Unwrap the Future: Sovereign Voice Orchestration", 
-                       style="bold white on magenta", justify="center")
-    layout["header"].update(Panel(header_text, style="magenta"))
-    
-    # Store full history
-    full_history = []
-    
-    # Config: How many chat bubbles to show at once
-    MAX_VISIBLE_BUBBLES = 6
+async def warm_up_tts(tts_service: NeuTTSService):
+    """Run a throwaway synthesis so model load and first-call costs are paid now."""
+    async for _ in tts_service.synthesize("ok"):
+        pass
 
-    def update_chat_view():
-        """Helper to render only the latest messages."""
-        visible_history = full_history[-MAX_VISIBLE_BUBBLES:]
+# ==============================================================================
+# Rasa Response Cache
+# The script is deterministic, so replies are memoized to disk and replayed
+# on later runs instead of going through Rasa -> Ollama again.
+# ==============================================================================
+def normalize_message(message: str) -> str:
+    """Lowercase and strip punctuation so ASR noise doesn't miss the cache."""
+    return " ".join(re.sub(r"[^\w\s]", "", message.lower()).split())
+
+def response_cache_key(sender: str, history: list[str]) -> str:
+    """
+    Key on the whole conversation so far, not just the latest message:
+    Rasa's reply depends on the dialogue state built up by earlier turns.
+    """
+    conversation = "|".join(normalize_message(message) for message in history)
+    return hashlib.blake2b(f"{sender}|{conversation}".encode(), digest_size=16).hexdigest()
+
+def load_response_cache():
+    """Load memoized Rasa replies from disk, if any."""
+    try:
+        RESPONSE_CACHE.update(json.loads(RESPONSE_CACHE_PATH.read_text()))
+    except (OSError, ValueError):
+        pass
+
+def save_response_cache():
+    """Persist memoized Rasa replies for the next run (atomically, via rename)."""
+    tmp_path = RESPONSE_CACHE_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(RESPONSE_CACHE))
+    os.replace(tmp_path, RESPONSE_CACHE_PATH)
+
+async def rasa_send(http: aiohttp.ClientSession, sender: str, message: str) -> list | None:
+    """POST one message to Rasa; returns the bot replies, or None on an HTTP error."""
+    async with http.post(RASA_URL, json={"sender": sender, "message": message}) as resp:
+        if resp.status != 200:
+            console.print(f"[red]Rasa error: {resp.status}[/red]")
+            return None
+        replies: list = orjson.loads(await resp.read())
+        return replies
+
+# ==============================================================================
+# Pipeline Workers
+# Driver -> ASR -> Rasa -> TTS -> Player, linked by asyncio queues so that the
+# agent reply for turn N plays while turn N+1 is already being transcribed.
+# ==============================================================================
+def post_status(ui_state: dict, message: str, color: str, style: str | None = None):
+    """Queue a status update; only the latest one per frame gets rendered."""
+    ui_state['status'] = status_panel(message, color, style)
+
+def post_chat(ui_state: dict, bubble: Align):
+    """Append a chat bubble to the conversation log."""
+    ui_state['history'].append(bubble)
+    ui_state['history_dirty'] = True
+
+def render_ui(live: Live, layout: Layout, ui_state: dict):
+    """Apply pending UI state to the layout and redraw if anything changed."""
+    changed = False
+    if ui_state['status'] is not None:
+        layout["status"].update(ui_state['status'])
+        ui_state['status'] = None
+        changed = True
+    if ui_state['history_dirty']:
         layout["main"].update(
             Panel(
-                Group(*visible_history), 
+                Group(*ui_state['history'][-MAX_VISIBLE_BUBBLES:]), 
                 title="Conversation Log", 
                 border_style="white",
                 padding=(1, 1)
             )
         )
+        ui_state['history_dirty'] = False
+        changed = True
+    if changed:
+        live.refresh()
+
+async def ui_renderer(live: Live, layout: Layout, ui_state: dict):
+    """
+    Single owner of the Live display. Workers only write to ui_state; this
+    task coalesces their updates and redraws at most once per frame.
+    """
+    while True:
+        await asyncio.sleep(RENDER_INTERVAL)
+        render_ui(live, layout, ui_state)
+
+async def asr_worker(asr_q: asyncio.Queue, nlu_q: asyncio.Queue, ui_state: dict,
+                     asr: ASRConnection):
+    """Transcribe each turn's pre-encoded audio."""
+    while True:
+        turn = await asr_q.get()
+        try:
+            post_status(ui_state, "⚡ Local ASR Transcribing (Faster-Whisper)...", "yellow")
+            turn.transcript = await asr.transcribe(turn.payload)
+            
+            if not turn.transcript:
+                console.print(f"[red]No transcript for {turn.step['file']}[/red]")
+                await turn.audio.put(None)
+                continue
+            
+            await nlu_q.put((turn, turn.transcript))
+        except Exception as e:
+            console.print(f"[red]ASR stage failed: {e}[/red]")
+            await turn.audio.put(None)
+        finally:
+            # The player waits on this before showing the user bubble
+            turn.transcribed.set()
+            asr_q.task_done()
+
+async def nlu_worker(nlu_q: asyncio.Queue, tts_q: asyncio.Queue, ui_state: dict,
+                     http: aiohttp.ClientSession, use_cache: bool = True):
+    """
+    Send transcripts to Rasa in order and forward the bot replies.
+    Cache hits never reach Rasa, so on the first miss the run goes live for
+    good: a fresh sender is caught up by replaying the earlier transcripts.
+    Only replies from that one live conversation are cached, and nothing
+    after a failed turn, since Rasa's state no longer matches the history.
+    """
+    history: list[str] = []
+    sender = None
+    record = True
+    while True:
+        turn, transcript = await nlu_q.get()
+        try:
+            post_status(ui_state, "🧠 Rasa Thinking (Ministral via Ollama)...", "green")
+            history.append(transcript)
+            key = response_cache_key(RASA_SENDER, history)
+            
+            bot_responses: list | None
+            if sender is None and use_cache and key in RESPONSE_CACHE:
+                bot_responses = RESPONSE_CACHE[key]
+            else:
+                if sender is None:
+                    sender = f"{RASA_SENDER}-{uuid.uuid4().hex[:8]}"
+                    # Replay the turns answered from the cache; their live
+                    # replies replace the cached ones
+                    for i, earlier in enumerate(history[:-1], 1):
+                        replayed = await rasa_send(http, sender, earlier)
+                        if replayed is None:
+                            record = False
+                            break
+                        RESPONSE_CACHE[response_cache_key(RASA_SENDER, history[:i])] = replayed
+                
+                bot_responses = await rasa_send(http, sender, transcript)
+                if bot_responses is None:
+                    record = False
+                    await turn.audio.put(None)
+                    continue
+                # Fresh replies are recorded even with --no-cache; run_demo
+                # writes them out once the whole script has played
+                if record:
+                    RESPONSE_CACHE[key] = bot_responses
+            
+            turn.replies = [
+                response['text'] for response in bot_responses
+                if isinstance(response.get('text'), str)
+            ]
+            await tts_q.put(turn)
+        except Exception as e:
+            console.print(f"[red]Rasa request failed: {e}[/red]")
+            record = False
+            await turn.audio.put(None)
+        finally:
+            nlu_q.task_done()
+
+async def tts_worker(tts_q: asyncio.Queue, tts_service: NeuTTSService):
+    """Synthesize the agent replies and hand PCM to the player."""
+    while True:
+        turn = await tts_q.get()
+        try:
+            for index, agent_text in enumerate(turn.replies):
+                # Tell the player which reply the following audio belongs to
+                await turn.audio.put(index)
+                # Synthesize sentence by sentence: turn.audio is bounded, so the
+                # next sentence is generated while the previous one plays
+                for sentence in SENT_RE.split(agent_text.strip()):
+                    async for pcm_audio in stream_tts_pcm(sentence, tts_service):
+                        await turn.audio.put(pcm_audio)
+        except Exception as e:
+            console.print(f"[red]TTS stage failed: {e}[/red]")
+        finally:
+            await turn.audio.put(None)
+            tts_q.task_done()
+
+async def player_worker(play_q: asyncio.Queue, ui_state: dict,
+                        speaker: sd.RawOutputStream):
+    """
+    Play turns in script order: the user clip, then the agent reply.
+    Chat bubbles are posted here, as each part plays, since the other stages
+    run ahead of playback.
+    """
+    while True:
+        turn = await play_q.get()
+        try:
+            post_status(ui_state, f"🔊 User is speaking... [{turn.step['label']}]", "cyan")
+            try:
+                await asyncio.to_thread(speaker.write, USER_AUDIO_PCM[turn.step['file']])
+            except Exception as e:
+                console.print(f"[red]Audio Error: {e}[/red]")
+            
+            await turn.transcribed.wait()
+            if turn.transcript:
+                post_chat(ui_state, chat_bubble(turn.transcript, "User", "cyan", Align.left))
+            
+            # Always drain to the end-of-turn marker so the TTS stage never
+            # blocks on a full queue, even if the audio device errors out
+            while (pcm_audio := await turn.audio.get()) is not None:
+                if isinstance(pcm_audio, int):
+                    post_chat(ui_state, chat_bubble(
+                        turn.replies[pcm_audio], "Agent (NeuTTS)", "green", Align.right
+                    ))
+                    post_status(ui_state, "🗣️ NeuTTS Generating & Speaking...", "magenta")
+                    continue
+                try:
+                    await asyncio.to_thread(speaker.write, pcm_audio)
+                except Exception as e:
+                    console.print(f"[red]Audio Error: {e}[/red]")
+        finally:
+            # The next turn starts as soon as this one has finished playing
+            play_q.task_done()
+
+async def join_queues(*queues: asyncio.Queue):
+    """Wait until every item put on each queue has been processed."""
+    for q in queues:
+        await q.join()
 
-    with Live(layout, refresh_per_second=10, screen=True) as live:
+async def run_demo(use_cache: bool = True):
+    layout = make_layout()
+    
+    # Header Styling
+    header_text = Text("🎁 Unwrap the Future: Sovereign Voice Orchestration", 
+                       style="bold white on magenta", justify="center")
+    layout["header"].update(Panel(header_text, style="magenta"))
+    
+    # All layout changes go through the renderer task
+    ui_state: dict[str, Any] = {'status': None, 'history': [], 'history_dirty': False}
+
+    # The renderer task drives every redraw, so Live's own refresh thread is off
+    with Live(layout, auto_refresh=False, screen=True) as live:
+        renderer = asyncio.create_task(ui_renderer(live, layout, ui_state))
         
         # Pre-flight checks
-        layout["status"].update(Panel(
-            Text("🔍 Running pre-flight checks...", style="bold yellow"), 
-            title="Status", border_style="yellow"
-        ))
+        post_status(ui_state, "🔍 Running pre-flight checks...", "yellow")
         
-        # Check Ollama
-        console.print("\n[yellow]Checking Ollama + Ministral...[/yellow]")
-        if not await check_ollama_connection():
-            layout["status"].update(Panel(
-                Text("❌ Ollama/Ministral not available\nRun: ollama serve && ollama pull ministral-3:14b", 
-                     style="bold red"), 
-                title="Status", border_style="red"
-            ))
-            await asyncio.sleep(5)
-            return
-        console.print("[green]✓ Ollama + Ministral ready[/green]")
+        # Check Ollama, ASR and Rasa concurrently: startup waits for the
+        # slowest check instead of the sum of all three timeouts. Only the
+        # Ollama model listing needs HTTP, and only on a cache miss.
+        console.print("\n[yellow]Checking Ollama + Ministral, Local ASR and Rasa...[/yellow]")
+        async with aiohttp.ClientSession() as session:
+            ollama_ok, asr_ok, rasa_ok = await asyncio.gather(
+                check_ollama_connection(session),
+                check_asr_connection(),
+                check_rasa_connection(),
+            )
         
-        # Check ASR
-        console.print("[yellow]Checking Local ASR server...[/yellow]")
-        if not await check_asr_connection():
-            layout["status"].update(Panel(
-                Text("❌ Local ASR server not running\nRun: make run-local-asr", 
-                     style="bold red"), 
-                title="Status", border_style="red"
-            ))
-            await asyncio.sleep(5)
-            return
-        console.print("[green]✓ Local ASR server ready[/green]")
+        checks = [
+            (ollama_ok, "Ollama + Ministral",
+             "❌ Ollama/Ministral not available\nRun: ollama serve && ollama pull ministral-3:14b"),
+            (asr_ok, "Local ASR server", "❌ Local ASR server not running\nRun: make run-local-asr"),
+            (rasa_ok, "Rasa server", "❌ Rasa server not running\nRun: make run"),
+        ]
+        for ok, name, error in checks:
+            if ok:
+                console.print(f"[green]✓ {name} ready[/green]")
+            else:
+                console.print(f"[red]{error}[/red]")
         
-        # Check Rasa
-        console.print("[yellow]Checking Rasa server...[/yellow]")
-        if not await check_rasa_connection():
-            layout["status"].update(Panel(
-                Text("❌ Rasa server not running\nRun: make run", 
-                     style="bold red"), 
-                title="Status", border_style="red"
-            ))
+        failures = [error for ok, _, error in checks if not ok]
+        if failures:
+            post_status(ui_state, failures[0], "red")
             await asyncio.sleep(5)
             return
-        console.print("[green]✓ Rasa server ready[/green]")
         
         # Initialize TTS
         console.print("[yellow]Initializing NeuTTS...[/yellow]")
-        layout["status"].update(Panel(
-            Text("⚙️ Loading NeuTTS model...", style="bold yellow"), 
-            title="Status", border_style="yellow"
-        ))
+        post_status(ui_state, "⚙️ Loading NeuTTS model...", "yellow")
         
         try:
             tts_config = NeuTTSConfig(
@@ -265,140 +663,108 @@ async def run_demo():
         except Exception as e:
             console.print(f"[red]❌ NeuTTS initialization failed: {e}[/red]")
             traceback.print_exc()
-            layout["status"].update(Panel(
-                Text(f"❌ TTS failed: {e}", style="bold red"), 
-                title="Status", border_style="red"
-            ))
+            post_status(ui_state, f"❌ TTS failed: {e}", "red")
             await asyncio.sleep(5)
             return
         
         # Check audio files
         if not AUDIO_DIR.exists():
-            layout["status"].update(Panel(
-                Text("❌ Test audio not found\nRun: make generate-audio", 
-                     style="bold red"), 
-                title="Status", border_style="red"
-            ))
+            post_status(ui_state, "❌ Test audio not found\nRun: make generate-audio", "red")
             await asyncio.sleep(5)
             return
         
-        # Main conversation loop
-        layout["status"].update(Panel(
-            Text("✨ All systems ready - Starting conversation...", style="bold green"), 
-            title="Status", border_style="green"
-        ))
-        await asyncio.sleep(1)
+        await preload_user_audio()
+        # Loaded even with --no-cache, so the end-of-run save keeps other entries
+        load_response_cache()
         
-        for step in CONVERSATION_STEPS:
-            audio_path = AUDIO_DIR / step['file']
-            
-            if not audio_path.exists():
-                console.print(f"[red]Missing: {audio_path}[/red]")
-                continue
-            
-            # --- STATE: USER SPEAKING ---
-            status_text = f"🔊 User is speaking... [{step['label']}]"
-            layout["status"].update(Panel(
-                Text(status_text, style="bold cyan"), 
-                title="Status", border_style="cyan"
-            ))
-            
-            # Play user audio
-            play(AudioSegment.from_wav(str(audio_path)))
+        # Open the connections shared by every turn
+        http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        asr = ASRConnection()
+        speaker = None
+        try:
+            await asr.connect()
             
-            # --- STATE: TRANSCRIBING ---
-            layout["status"].update(Panel(
-                Text("⚡ Local ASR Transcribing (Faster-Whisper)...", style="bold yellow"), 
-                title="Status", border_style="yellow"
-            ))
-            transcript = await local_asr_transcribe(audio_path)
+            # All audio (user clips and agent speech) goes to one long-lived
+            # 8kHz output stream instead of spawning a player per utterance
+            speaker = sd.RawOutputStream(
+                samplerate=8000, channels=1, dtype='int16', blocksize=0
+            )
+            speaker.start()
             
-            if not transcript:
-                console.print(f"[red]No transcript for {audio_path}[/red]")
-                continue
+            # Warm TTS and ASR in parallel so the first turn sees steady-state latency
+            post_status(ui_state, "🔥 Warming models...", "yellow")
+            warmups = [warm_up_tts(tts_service)]
+            if ASR_PAYLOAD_CACHE:
+                warmups.append(asr.transcribe(next(iter(ASR_PAYLOAD_CACHE.values()))))
+            await asyncio.gather(*warmups)
             
-            # Add User Message
-            user_panel = Align.left(
-                Panel(
-                    Text(transcript, style="bright_white"),
-                    title="User",
-                    style="cyan",
-                    box=box.ROUNDED,
-                    padding=(1, 2),
-                    width=60
-                )
-            )
-            full_history.append(user_panel)
-            update_chat_view()
+            # Main conversation pipeline
+            post_status(ui_state, "✨ All systems ready - Starting conversation...", "green")
+            await asyncio.sleep(1)
             
-            # --- STATE: RASA THINKING ---
-            layout["status"].update(Panel(
-                Text("🧠 Rasa Thinking (Ministral via Ollama)...", style="bold green"), 
-                title="Status", border_style="green"
-            ))
+            asr_q: asyncio.Queue[Turn] = asyncio.Queue(maxsize=QUEUE_DEPTH)
+            nlu_q: asyncio.Queue[tuple[Turn, str]] = asyncio.Queue(maxsize=QUEUE_DEPTH)
+            tts_q: asyncio.Queue[Turn] = asyncio.Queue(maxsize=QUEUE_DEPTH)
+            play_q: asyncio.Queue[Turn] = asyncio.Queue(maxsize=QUEUE_DEPTH)
+            workers = [
+                asyncio.create_task(asr_worker(asr_q, nlu_q, ui_state, asr)),
+                asyncio.create_task(nlu_worker(nlu_q, tts_q, ui_state, http, use_cache)),
+                asyncio.create_task(tts_worker(tts_q, tts_service)),
+                asyncio.create_task(player_worker(play_q, ui_state, speaker)),
+            ]
             
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        RASA_URL, 
-                        json={"sender": "demo-user", "message": transcript},
-                        timeout=aiohttp.ClientTimeout(total=30)
-                    ) as resp:
-                        if resp.status != 200:
-                            console.print(f"[red]Rasa error: {resp.status}[/red]")
-                            continue
-                        bot_responses = await resp.json()
-            except Exception as e:
-                console.print(f"[red]Rasa request failed: {e}[/red]")
-                continue
-            
-            # --- STATE: AGENT SPEAKING ---
-            for response in bot_responses:
-                if 'text' in response:
-                    agent_text = response['text']
-                    
-                    # Add Agent Message
-                    agent_panel = Align.right(
-                        Panel(
-                            Text(agent_text, style="bright_white"),
-                            title="Agent (NeuTTS)",
-                            style="green",
-                            box=box.ROUNDED,
-                            padding=(1, 2),
-                            width=60
-                        )
-                    )
-                    full_history.append(agent_panel)
-                    update_chat_view()
+                for step in CONVERSATION_STEPS:
+                    if step['file'] not in ASR_PAYLOAD_CACHE:
+                        console.print(f"[red]Missing: {AUDIO_DIR / step['file']}[/red]")
+                        continue
                     
-                    layout["status"].update(Panel(
-                        Text("🗣️ NeuTTS Generating & Speaking...", style="bold magenta"), 
-                        title="Status", border_style="magenta"
-                    ))
-                    
-                    # Generate and Play
-                    pcm_audio = await neutts_synthesize(agent_text, tts_service)
-                    if pcm_audio:
-                        # Convert PCM to playable format
-                        audio_segment = AudioSegment(
-                            data=pcm_audio,
-                            sample_width=2,
-                            frame_rate=8000,
-                            channels=1
-                        )
-                        play(audio_segment)
-
-            time.sleep(0.5)
-
-        layout["status"].update(Panel(
-            Text("✨ Demo Complete - 100% Sovereign Stack!", style="bold white on green"), 
-            title="Status", border_style="green"
-        ))
+                    turn = Turn(step, ASR_PAYLOAD_CACHE[step['file']])
+                    # The player queue fixes playback order; ASR starts right away
+                    await play_q.put(turn)
+                    await asr_q.put(turn)
+                
+                # Wait for every queue to drain, but fail loudly instead of
+                # hanging if a worker task dies
+                drained = asyncio.create_task(join_queues(asr_q, nlu_q, tts_q, play_q))
+                await asyncio.wait([drained, *workers], return_when=asyncio.FIRST_COMPLETED)
+                if not drained.done():
+                    drained.cancel()
+                    dead = next(task for task in workers if task.done())
+                    raise RuntimeError(f"Pipeline worker stopped: {dead.exception()!r}")
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+            
+            # Only a run that played to the end replaces the cache file
+            save_response_cache()
+        except Exception as e:
+            console.print(f"[red]❌ Conversation failed: {e}[/red]")
+            post_status(ui_state, f"❌ Conversation failed: {e}", "red")
+            await asyncio.sleep(5)
+            return
+        finally:
+            if speaker is not None:
+                speaker.stop()
+                speaker.close()
+            await asr.close()
+            await http.close()
+
+        post_status(ui_state, "✨ Demo Complete - 100% Sovereign Stack!", "green", "bold white on green")
         await asyncio.sleep(10)
+        renderer.cancel()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sovereign Voice Orchestration Demo")
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help=f"Always query Rasa instead of replaying replies from {RESPONSE_CACHE_PATH}"
+    )
+    args = parser.parse_args()
+    
     try:
-        asyncio.run(run_demo())
+        asyncio.run(run_demo(use_cache=not args.no_cache))
     except KeyboardInterrupt:
         console.print("\n[yellow]Demo interrupted by user[/yellow]")
         sys.exit(0)
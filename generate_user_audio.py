@@ -5,6 +5,7 @@ Uses GTTS to create distinct user voice (different from NeuTTS agent)
 """
 
 import asyncio
+import audioop
 from pathlib import Path
 from gtts import gTTS
 from pydub import AudioSegment
@@ -24,36 +25,37 @@ TRANSCRIPTS = {
 }
 
 def generate_audio(filename: str, text: str):
-    """Generate audio using GTTS with consistent voice settings."""
+    """
+    Generate audio using GTTS with consistent voice settings.
+    Runs in a worker thread, so errors are raised for main() to report.
+    """
+    output_path = OUTPUT_DIR / filename
+    temp_mp3 = OUTPUT_DIR / f"temp_{filename}.mp3"
+    
     try:
-        output_path = OUTPUT_DIR / filename
-        temp_mp3 = OUTPUT_DIR / f"temp_{filename}.mp3"
-        
-        print(f"Generating: {filename}")
-        print(f"  Text: \"{text}\"")
-        
         # Generate MP3 with GTTS
         # Using en-us for American accent, slow=False for natural speed
         tts = gTTS(text=text, lang='en', slow=False, tld='us')
         tts.save(str(temp_mp3))
         
-        # Convert to WAV (16kHz, mono for compatibility)
+        # Convert to WAV (8kHz, mono, 16-bit - the demo's playback format)
         audio = AudioSegment.from_mp3(str(temp_mp3))
         audio = audio.set_channels(1)  # Mono
-        audio = audio.set_frame_rate(16000)  # 16kHz (standard for ASR)
+        audio = audio.set_frame_rate(8000)  # 8kHz (telephony rate used by the ASR path)
+        audio = audio.set_sample_width(2)  # 16-bit
         audio.export(str(output_path), format="wav")
         
+        # Also write the mulaw payload the ASR server consumes, so the demo
+        # can send it as-is instead of converting at runtime
+        output_path.with_suffix(".ulaw").write_bytes(audioop.lin2ulaw(audio.raw_data, 2))
+    finally:
         # Cleanup temp file
-        temp_mp3.unlink()
-        
-        print(f"  ✓ Saved: {output_path}")
-        print()
-        
-    except Exception as e:
-        print(f"  ✗ Error: {e}")
-        sys.exit(1)
+        temp_mp3.unlink(missing_ok=True)
+    
+    # Single print so concurrent workers don't interleave their lines
+    print(f"Generated: {filename}\n  Text: \"{text}\"\n  ✓ Saved: {output_path} (+ .ulaw)\n")
 
-def main():
+async def main():
     print("=" * 70)
     print("Generating User Audio Files (GTTS)")
     print("=" * 70)
@@ -76,9 +78,23 @@ def main():
     print(f"Files to generate: {len(TRANSCRIPTS)}")
     print()
     
-    # Generate all audio files
-    for filename, text in TRANSCRIPTS.items():
-        generate_audio(filename, text)
+    # Generate all audio files concurrently (gTTS round-trips and ffmpeg
+    # decodes overlap, so wall time is roughly the slowest clip)
+    results = await asyncio.gather(
+        *(asyncio.to_thread(generate_audio, filename, text)
+          for filename, text in TRANSCRIPTS.items()),
+        return_exceptions=True,
+    )
+    
+    errors = [
+        (filename, result)
+        for filename, result in zip(TRANSCRIPTS, results)
+        if isinstance(result, Exception)
+    ]
+    if errors:
+        for filename, error in errors:
+            print(f"✗ Error generating {filename}: {error}")
+        sys.exit(1)
     
     print("=" * 70)
     print("✓ All audio files generated successfully!")
@@ -91,4 +107,4 @@ def main():
     print()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,18 +1,16 @@
 #!/usr/bin/env python3
-"""Quick health check for Local ASR server."""
+"""Quick health check for Local ASR server (stdlib only, TCP connect probe)."""
 import asyncio
 import sys
 
-try:
-    import websockets
-except ImportError:
-    print("Error: websockets not installed")
-    sys.exit(1)
-
 async def check_asr():
     try:
-        async with websockets.connect('ws://localhost:9001', open_timeout=5) as ws:
-            return True
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection('localhost', 9001), timeout=2
+        )
+        writer.close()
+        await writer.wait_closed()
+        return True
     except Exception:
         return False
 
@@ -22,6 +22,10 @@ PORT = 9001
 DEVICE = "cpu"
 COMPUTE_TYPE = "int8" # Optimized for CPU
 
+# Clients may append this to their last audio frame instead of sending a
+# separate {"action": "transcribe"} message, saving one send per utterance
+AUDIO_END_MARKER = b"\x00ENDAUDIO"
+
 class ASRHandler:
     def __init__(self):
         logger.info(f"Loading Whisper Model ({MODEL_SIZE}) on {DEVICE}...")
@@ -44,7 +48,24 @@ class ASRHandler:
         return text
 
 # Initialize engine globally
-asr_engine = None
+asr_engine: ASRHandler | None = None
+
+async def send_transcript(websocket, audio_buffer: bytearray):
+    """Transcribe the buffered audio, reply with the text and reset the buffer."""
+    if len(audio_buffer) > 0:
+        assert asr_engine is not None, "ASR engine is created in main() before serving"
+        logger.info(f"Processing {len(audio_buffer)} bytes...")
+        text = asr_engine.transcribe(bytes(audio_buffer))
+        logger.info(f"Transcript: '{text}'")
+        
+        # Send back to Rasa
+        await websocket.send(json.dumps({
+            "text": text,
+            "is_final": True
+        }))
+        audio_buffer.clear()
+    else:
+        logger.info("Transcribe requested but buffer empty")
 
 async def echo(websocket):
     """
@@ -64,22 +85,15 @@ async def echo(websocket):
                 
                 # Signal from Rasa that user stopped talking
                 if msg_data.get("action") == "transcribe":
-                    if len(audio_buffer) > 0:
-                        logger.info(f"Processing {len(audio_buffer)} bytes...")
-                        text = asr_engine.transcribe(bytes(audio_buffer))
-                        logger.info(f"Transcript: '{text}'")
-                        
-                        # Send back to Rasa
-                        await websocket.send(json.dumps({
-                            "text": text,
-                            "is_final": True
-                        }))
-                        audio_buffer = bytearray()
-                    else:
-                        logger.info("Transcribe requested but buffer empty")
+                    await send_transcript(websocket, audio_buffer)
             
             # Audio Data (Bytes)
             elif isinstance(message, bytes):
+                # Last frame of an utterance may carry the end-of-audio marker
+                end_of_audio = message.endswith(AUDIO_END_MARKER)
+                if end_of_audio:
+                    message = message[:-len(AUDIO_END_MARKER)]
+                
                 # Rasa sends 8kHz mulaw. Whisper needs 16kHz PCM.
                 try:
                     # 1. Decode Mulaw -> Linear PCM (16-bit)
@@ -92,6 +106,9 @@ async def echo(websocket):
                     audio_buffer.extend(pcm_16k)
                 except Exception as e:
                     logger.error(f"Audio processing error: {e}")
+                
+                if end_of_audio:
+                    await send_transcript(websocket, audio_buffer)
 
     except websockets.exceptions.ConnectionClosed:
         logger.info("Connection closed")
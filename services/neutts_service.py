@@ -1,4 +1,5 @@
 # recipes/level-2-intermediate/sovereign-voice-assistant/services/neutts_service.py
+import asyncio
 import os
 import io
 import platform
@@ -169,7 +170,8 @@ class NeuTTSService(TTSEngine[NeuTTSConfig]):
         4. Yield to Rasa
         """
         if not self._initialized:
-            self._initialize_model()
+            # Model loading is blocking; keep it off the event loop too
+            await asyncio.to_thread(self._initialize_model)
 
         # Sanity check for empty text
         if not text or not text.strip():
@@ -182,7 +184,11 @@ class NeuTTSService(TTSEngine[NeuTTSConfig]):
         try:
             # We use the blocking infer call because streaming infer in NeuTTS 
             # might not support the chunk-based resampling cleanly yet.
-            wav_24k = self.tts.infer(text, self.ref_codes, self.ref_text)
+            # Run in a worker thread so the event loop keeps serving other
+            # pipeline stages (ASR, Rasa, playback) during inference.
+            wav_24k = await asyncio.to_thread(
+                self.tts.infer, text, self.ref_codes, self.ref_text
+            )
         except Exception as e:
             logger.error(f"NeuTTS Inference failed: {e}")
             return